@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import selectors
 import socket
 import time
 
@@ -7,70 +8,117 @@ BIND_IP = "192.168.0.2"   # BeagleBone’s IP
 BIND_PORT = 10001
 PACKET_SIZE = 800
 REPORT_INTERVAL = 3  # seconds
+RECV_BATCH = 64  # max datagrams drained per wakeup, so stats still run under load
+RCVBUF_SIZE = 4 * 1024 * 1024  # bytes, absorbs VLC bursts; capped by net.core.rmem_max
+SNDBUF_SIZE = 1 * 1024 * 1024  # bytes; capped by net.core.wmem_max
+IP_TOS_LOWDELAY = 0x10
 
 DEST_IP = "turtlebot"     # Hostname of TurtleBot (resolves via /etc/hosts or mDNS)
 DEST_PORT = 10001
 
+START_MARKER = b"<START>"
+END_MARKER = b"<END>"
+
 # Create UDP socket for receiving
 recv_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+recv_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF_SIZE)
+
+# The kernel silently caps SO_RCVBUF at net.core.rmem_max (~208 KiB by default).
+# Linux reports 2 * min(requested, rmem_max), so anything below twice the request means it was capped.
+rcvbuf = recv_sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+if rcvbuf < 2 * RCVBUF_SIZE:
+    print("Warning: receive buffer capped at {} bytes (asked {}); raise it with: "
+          "sudo sysctl -w net.core.rmem_max={}".format(rcvbuf // 2, RCVBUF_SIZE, RCVBUF_SIZE))
 recv_sock.bind((BIND_IP, BIND_PORT))
+recv_sock.setblocking(False)
+
+# Wait for readability, then drain up to RECV_BATCH queued datagrams per wakeup
+sel = selectors.DefaultSelector()
+sel.register(recv_sock, selectors.EVENT_READ)
 
 # Create UDP socket for sending (relay)
 send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+send_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SNDBUF_SIZE)
+send_sock.setsockopt(socket.IPPROTO_IP, socket.IP_TOS, IP_TOS_LOWDELAY)
+
+# Resolve the TurtleBot hostname once and fix the destination on the socket
+dest_addr = socket.getaddrinfo(DEST_IP, DEST_PORT, socket.AF_INET, socket.SOCK_DGRAM)[0][4]
+send_sock.connect(dest_addr)
 
 print("Listening on {}:{} (UDP, {} packets)...".format(BIND_IP, BIND_PORT, PACKET_SIZE))
 
 start_time = time.time()
 last_report = start_time
 recv_packets = 0
+reported_packets = 0
 
-buffer = ""
+buffer = bytearray()
 inside_message = False
 
+# Reusable receive buffer; the kernel writes each datagram straight into it
+recv_buf = bytearray(PACKET_SIZE)
+recv_view = memoryview(recv_buf)
+
 try:
     while True:
-        data, addr = recv_sock.recvfrom(PACKET_SIZE)
-        recv_packets += 1
-
-        # Decode packet text and strip padding spaces
-        chunk = data.decode("utf-8", errors="ignore").strip()
-
-        # Handle possible START marker
-        if "<START>" in chunk:
-            buffer = ""
-            inside_message = True
-            start_idx = chunk.find("<START>") + len("<START>")
-            chunk = chunk[start_idx:]
-
-        if inside_message:
-            if "<END>" in chunk:
-                end_idx = chunk.find("<END>")
-                buffer += chunk[:end_idx]
-
-                # Print locally
-                print("[{}] MESSAGE RECEIVED: {}".format(addr[0], buffer))
-
-                # Relay message to TurtleBot
-                full_msg = "<START>" + buffer + "<END>"
-                send_sock.sendto(full_msg.encode("utf-8"), (DEST_IP, DEST_PORT))
-                print("Relayed message to {}:{}".format(DEST_IP, DEST_PORT))
-
-                # Reset for next message
-                buffer = ""
-                inside_message = False
-            else:
-                buffer += chunk
-
-        # Periodic stats
-        now = time.time()
-        if now - last_report >= REPORT_INTERVAL:
-            elapsed = now - start_time
-            print("--- Report @ {:.1f}s: received {} packets ---".format(elapsed, recv_packets))
-            last_report = now
+        sel.select(timeout=REPORT_INTERVAL)
+        for _ in range(RECV_BATCH):
+            try:
+                nbytes, addr = recv_sock.recvfrom_into(recv_view)
+            except BlockingIOError:
+                break
+            recv_packets += 1
+
+            # Padding spaces only ever follow <END>, so cutting at the marker drops them
+            begin = 0
+
+            # Handle possible START marker
+            start_idx = recv_buf.find(START_MARKER, 0, nbytes)
+            if start_idx != -1:
+                del buffer[:]
+                inside_message = True
+                begin = start_idx + len(START_MARKER)
+
+            if inside_message:
+                end_idx = recv_buf.find(END_MARKER, begin, nbytes)
+                if end_idx != -1:
+                    buffer.extend(recv_view[begin:end_idx])
+
+                    # Print locally
+                    print("[{}] MESSAGE RECEIVED: {}".format(
+                        addr[0], buffer.decode("utf-8", errors="ignore")))
+
+                    # Relay message to TurtleBot
+                    full_msg = START_MARKER + bytes(buffer) + END_MARKER
+                    try:
+                        send_sock.send(full_msg)
+                        print("Relayed message to {}:{}".format(DEST_IP, DEST_PORT))
+                    except ConnectionRefusedError:
+                        # Connected UDP reports an earlier ICMP port-unreachable here
+                        print("Relay to {}:{} refused (bridge not listening?)".format(DEST_IP, DEST_PORT))
+                    except OSError as e:
+                        # ...and host/net unreachable (TurtleBot off, ARP failure) as other errors
+                        print("Relay to {}:{} failed: {}".format(DEST_IP, DEST_PORT, e))
+
+                    # Reset for next message
+                    del buffer[:]
+                    inside_message = False
+                else:
+                    buffer.extend(recv_view[begin:nbytes])
+
+        # Periodic stats (one clock read per wakeup/batch; skipped while idle)
+        if recv_packets != reported_packets:
+            now = time.time()
+            if now - last_report >= REPORT_INTERVAL:
+                elapsed = now - start_time
+                print("--- Report @ {:.1f}s: received {} packets ---".format(elapsed, recv_packets))
+                last_report = now
+                reported_packets = recv_packets
 
 except KeyboardInterrupt:
     print("\nStopping relay...")
 
 finally:
+    sel.close()
     recv_sock.close()
     send_sock.close()
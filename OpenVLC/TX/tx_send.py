@@ -7,13 +7,22 @@ DEST_IP = "192.168.0.2"
 DEST_PORT = 10001
 PACKET_SIZE = 800      # bytes
 BANDWIDTH = 400000     # bits per second
+SNDBUF_SIZE = 1 * 1024 * 1024  # bytes; capped by net.core.wmem_max
+IP_TOS_LOWDELAY = 0x10
+SLEEP_THRESHOLD_NS = 1000000  # only sleep when more than this much time is left
+SPIN_MARGIN_NS = 500000       # busy-wait the last part of each gap for sub-ms accuracy
 
 # Calculate packets per second
 packets_per_sec = BANDWIDTH / float(PACKET_SIZE * 8)
-delay = 1.0 / packets_per_sec
+delay_ns = int(1e9 / packets_per_sec)
+
+# Padding source, built once and sliced per message
+PAD = b" " * PACKET_SIZE
 
 # Create UDP socket
 sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SNDBUF_SIZE)
+sock.setsockopt(socket.IPPROTO_IP, socket.IP_TOS, IP_TOS_LOWDELAY)
 
 print("Ready to send messages to {}:{} ({}B packets at {:.1f} kbps)...".format(
     DEST_IP, DEST_PORT, PACKET_SIZE, BANDWIDTH / 1000.0))
@@ -26,21 +35,29 @@ try:
 
         full_msg = "<START>" + user_msg + "<END>"
 
-        # Encode and split into packets
-        full_bytes = full_msg.encode("utf-8")
-        packets = []
-        for i in range(0, len(full_bytes), PACKET_SIZE):
-            chunk = full_bytes[i:i + PACKET_SIZE]
-            if len(chunk) < PACKET_SIZE:
-                chunk = chunk.ljust(PACKET_SIZE, b" ")  # pad with spaces
-            packets.append(chunk)
+        # Encode into one buffer padded with spaces to a whole number of packets
+        buf = bytearray(full_msg.encode("utf-8"))
+        pad_len = -len(buf) % PACKET_SIZE
+        buf += PAD[:pad_len]
+        view = memoryview(buf)
 
-        # Send packets
+        # Send packets, pacing against absolute deadlines so sleep jitter doesn't accumulate.
+        # Sleep through most of each gap, then spin to the deadline (sleep is ~1 ms coarse).
         sent_packets = 0
-        for pkt in packets:
-            sock.sendto(pkt, (DEST_IP, DEST_PORT))
+        deadline_ns = time.perf_counter_ns()
+        for i in range(0, len(buf), PACKET_SIZE):
+            sock.sendto(view[i:i + PACKET_SIZE], (DEST_IP, DEST_PORT))
             sent_packets += 1
-            time.sleep(delay)
+            deadline_ns += delay_ns
+            now_ns = time.perf_counter_ns()
+            if deadline_ns < now_ns - delay_ns:
+                # fell behind (stalled send / descheduled): resync rather than burst to catch up
+                deadline_ns = now_ns
+            slack_ns = deadline_ns - now_ns
+            if slack_ns > SLEEP_THRESHOLD_NS:
+                time.sleep((slack_ns - SPIN_MARGIN_NS) / 1e9)
+            while time.perf_counter_ns() < deadline_ns:
+                pass
 
         print("Message sent. ({} packets)".format(sent_packets))
 
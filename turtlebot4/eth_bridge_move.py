@@ -1,14 +1,15 @@
 #!/usr/bin/env python3
 import socket
 import threading
+from collections import deque
 import re
 import math
-from functools import partial
 
 import rclpy
 from rclpy.node import Node
 from rclpy.action import ActionClient
 from rclpy.qos import QoSProfile, QoSReliabilityPolicy, QoSHistoryPolicy
+from rclpy.logging import LoggingSeverity
 
 from geometry_msgs.msg import Twist, TwistStamped
 from irobot_create_msgs.action import DriveDistance, RotateAngle
@@ -19,6 +20,9 @@ from irobot_create_msgs.action import DriveDistance, RotateAngle
 # =========================
 DEFAULT_PORT = 10001
 DEFAULT_BIND_IP = "0.0.0.0"
+UDP_RCVBUF_SIZE = 4 * 1024 * 1024  # bytes; capped by net.core.rmem_max
+IP_TOS_LOWDELAY = 0x10
+UDP_DRAIN_BATCH = 64  # max datagrams handled per executor callback
 
 COMMAND_HELP = """
 Commands:
@@ -35,9 +39,26 @@ Examples:
   vel 0.2 -0.3
 """
 
+# ---- Precompiled argument patterns (matched against the text after the verb) ----
+_FLOAT = r'([+-]?\d+(?:\.\d+)?)'
+_DRIVE_RE = re.compile(
+    r'^(forward|backward)\s+' + _FLOAT +
+    r'(?:\s+speed\s+' + _FLOAT + r')?\s*$', re.IGNORECASE
+)
+_ROTATE_RE = re.compile(
+    r'^(clockwise|counterclockwise|anticlockwise)\s+' + _FLOAT +
+    r'(?:\s+speed\s+' + _FLOAT + r')?\s*$', re.IGNORECASE
+)
+# Lenient marker forms (e.g. "< START >"); only used when the literal check misses
+_STRIP_START_RE = re.compile(r'^\s*<\s*start\s*>\s*', re.IGNORECASE)
+_STRIP_END_RE = re.compile(r'\s*<\s*end\s*>\s*$', re.IGNORECASE)
+
+
+_DEG2RAD = math.pi / 180.0
+
 
 def clamp(val, lo, hi):
-    return max(lo, min(val, hi))
+    return lo if val < lo else (hi if val > hi else val)
 
 
 def strip_wrappers(text: str) -> str:
@@ -49,17 +70,22 @@ def strip_wrappers(text: str) -> str:
     # remove surrounding quotes if sender added them
     if (t.startswith('"') and t.endswith('"')) or (t.startswith("'") and t.endswith("'")):
         t = t[1:-1]
-    # strip start/end markers anywhere at the edges
-    t = re.sub(r'^\s*<\s*start\s*>\s*', '', t, flags=re.IGNORECASE)
-    t = re.sub(r'\s*<\s*end\s*>\s*$', '', t, flags=re.IGNORECASE)
+    t = t.strip()
+    # fast path: exact <START>...<END> framing, as sent by the relay
+    low = t.lower()
+    if low.startswith('<start>') and low.endswith('<end>'):
+        return ' '.join(t[7:-5].split())
+    # otherwise strip any (possibly spaced) start/end markers at the edges
+    t = _STRIP_START_RE.sub('', t)
+    t = _STRIP_END_RE.sub('', t)
     # normalize whitespace
-    t = re.sub(r'\s+', ' ', t).strip()
-    return t
+    return ' '.join(t.split())
 
 
 class TurtleBotEthernetBridge(Node):
     def __init__(self):
         super().__init__('turtlebot_ethernet_bridge')
+        self._log = self.get_logger()
 
         # ---- Parameters ----
         self.declare_parameter('bind_ip', DEFAULT_BIND_IP)
@@ -89,32 +115,63 @@ class TurtleBotEthernetBridge(Node):
         )
 
         # ---- Publisher for velocity ----
+        # One message instance is reused for every publish (publish() serializes it)
         if self.use_twist_stamped:
             self.vel_pub = self.create_publisher(TwistStamped, self.cmd_vel_topic, qos)
-            self.get_logger().info(f'Publishing TwistStamped on {self.cmd_vel_topic}')
+            self._vel_msg = TwistStamped()
+            self._publish_velocity = self._publish_stamped
+            self._log.info(f'Publishing TwistStamped on {self.cmd_vel_topic}')
         else:
             self.vel_pub = self.create_publisher(Twist, self.cmd_vel_topic, qos)
-            self.get_logger().info(f'Publishing Twist on {self.cmd_vel_topic}')
+            self._vel_msg = Twist()
+            self._publish_velocity = self._publish_plain
+            self._log.info(f'Publishing Twist on {self.cmd_vel_topic}')
 
         # ---- Action clients ----
         self.drive_client = ActionClient(self, DriveDistance, self.drive_action_name)
         self.rotate_client = ActionClient(self, RotateAngle, self.rotate_action_name)
 
+        # ---- Command verb dispatch ----
+        self._commands = {
+            'stop': self._do_stop,
+            'e-stop': self._do_stop,
+            'estop': self._do_stop,
+            'vel': self._do_vel,
+            'velocity': self._do_vel,
+            'drive': self._do_drive,
+            'rotate': self._do_rotate,
+        }
+
         # ---- UDP setup ----
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF_SIZE)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_TOS, IP_TOS_LOWDELAY)
         try:
             self.sock.bind((self.bind_ip, self.bind_port))
         except OSError as e:
-            self.get_logger().error(f'Failed to bind UDP socket on {self.bind_ip}:{self.bind_port} - {e}')
+            self._log.error(f'Failed to bind UDP socket on {self.bind_ip}:{self.bind_port} - {e}')
             raise
 
-        self.get_logger().info(
+        # The kernel silently caps SO_RCVBUF at net.core.rmem_max (~208 KiB by default).
+        # Linux reports 2 * min(requested, rmem_max), so anything below twice the request means it was capped.
+        rcvbuf = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        if rcvbuf < 2 * UDP_RCVBUF_SIZE:
+            self._log.warn(
+                f'UDP receive buffer capped at {rcvbuf // 2} bytes (asked {UDP_RCVBUF_SIZE}); '
+                f'raise it with: sudo sysctl -w net.core.rmem_max={UDP_RCVBUF_SIZE}'
+            )
+
+        self._log.info(
             f'Listening for commands on {self.bind_ip}:{self.bind_port} (UDP)\n' + COMMAND_HELP
         )
 
         # ---- Background threads ----
+        # The listener thread only receives and queues datagrams; the guard condition
+        # wakes the executor, which parses and publishes on its own thread.
         self._shutdown = False
+        self._udp_queue = deque()
+        self._udp_ready = self.create_guard_condition(self._drain_udp)
         threading.Thread(target=self._wait_for_action_servers, daemon=True).start()
         self.listener_thread = threading.Thread(target=self._udp_loop, daemon=True)
         self.listener_thread.start()
@@ -122,92 +179,124 @@ class TurtleBotEthernetBridge(Node):
     # -------- Action server readiness --------
     def _wait_for_action_servers(self):
         while not self._shutdown and not self.drive_client.wait_for_server(timeout_sec=0.5):
-            self.get_logger().warn(f'Waiting for {self.drive_action_name} action server...')
+            self._log.warn(f'Waiting for {self.drive_action_name} action server...')
         while not self._shutdown and not self.rotate_client.wait_for_server(timeout_sec=0.5):
-            self.get_logger().warn(f'Waiting for {self.rotate_action_name} action server...')
-        self.get_logger().info('Action servers ready.')
+            self._log.warn(f'Waiting for {self.rotate_action_name} action server...')
+        self._log.info('Action servers ready.')
 
-    # -------- UDP receive loop --------
+    # -------- UDP receive loop (listener thread) --------
     def _udp_loop(self):
-        self.get_logger().info('UDP listener running.')
+        self._log.info('UDP listener running.')
         while not self._shutdown:
             try:
                 data, addr = self.sock.recvfrom(4096)
             except OSError:
                 break
+            self._udp_queue.append((data, addr))
+            self._udp_ready.trigger()
+
+    # -------- UDP command handling (executor thread) --------
+    def _drain_udp(self):
+        queue = self._udp_queue
+        for _ in range(UDP_DRAIN_BATCH):
+            if not queue:
+                return
+            data, addr = queue.popleft()
             raw = data.decode('utf-8', errors='ignore')
             text = strip_wrappers(raw)
             if not text:
                 continue
-            self.get_logger().info(f'Recv from {addr}: "{text}"')
+            if self._log.is_enabled_for(LoggingSeverity.DEBUG):
+                self._log.debug(f'Recv from {addr}: "{text}"')
             self._handle_command(text, addr)
+        # batch limit hit: yield so action-future callbacks get a turn, then resume
+        if queue:
+            self._udp_ready.trigger()
 
     # -------- Command parser/dispatcher --------
     def _handle_command(self, text: str, addr):
-        # stop
-        if text in ('stop', 'e-stop', 'estop'):
-            self._publish_velocity(0.0, 0.0)
-            self._reply(addr, 'ok: stopped')
+        verb, _, rest = text.partition(' ')
+        handler = self._commands.get(verb.lower())
+        if handler is None:
+            self._reply_parse_error(addr)
             return
+        handler(rest, addr)
 
-        # vel <vx> <wz>
-        m = re.match(r'^(?:vel|velocity)\s+([+-]?\d+(?:\.\d+)?)\s+([+-]?\d+(?:\.\d+)?)\s*$', text, re.I)
-        if m:
-            vx = clamp(float(m.group(1)), -0.6, 0.6)
-            wz = clamp(float(m.group(2)), -2.0, 2.0)
-            self._publish_velocity(vx, wz)
-            self._reply(addr, f'ok: vel {vx:.3f} {wz:.3f}')
-            return
+    def _reply_parse_error(self, addr):
+        self._reply(addr, 'error: could not parse command\n' + COMMAND_HELP)
 
-        # drive forward/backward <meters> [speed <mps>]
-        m = re.match(
-            r'^(?:drive)\s+(forward|backward)\s+([+-]?\d+(?:\.\d+)?)'
-            r'(?:\s+speed\s+([+-]?\d+(?:\.\d+)?))?\s*$', text, re.I
-        )
-        if m:
-            direction = m.group(1).lower()
-            meters = float(m.group(2))
-            speed = float(m.group(3)) if m.group(3) is not None else self.default_drive_speed
-            meters = abs(meters) if direction == 'forward' else -abs(meters)
-            speed = clamp(speed, 0.05, 0.5)
-            self._send_drive_distance(meters, speed, addr)
+    # stop
+    def _do_stop(self, rest: str, addr):
+        if rest:
+            self._reply_parse_error(addr)
             return
+        self._publish_velocity(0.0, 0.0)
+        self._reply(addr, 'ok: stopped')
 
-        # rotate clockwise/counterclockwise <degrees> [speed <radps>]
-        m = re.match(
-            r'^(?:rotate)\s+(clockwise|counterclockwise|anticlockwise)\s+([+-]?\d+(?:\.\d+)?)'
-            r'(?:\s+speed\s+([+-]?\d+(?:\.\d+)?))?\s*$', text, re.I
-        )
-        if m:
-            sense = m.group(1).lower()
-            degrees = float(m.group(2))
-            rot_speed = float(m.group(3)) if m.group(3) is not None else self.default_rot_speed
-            radians = math.radians(abs(degrees))
-            if sense == 'clockwise':  # right-hand rule z-up: CW negative
-                radians = -radians
-            rot_speed = clamp(rot_speed, 0.1, 1.5)
-            self._send_rotate_angle(radians, rot_speed, addr)
+    # vel <vx> <wz>
+    def _do_vel(self, rest: str, addr):
+        # plain split + float(): no regex on the teleop hot path
+        try:
+            a, b = rest.split()
+            vx = float(a)
+            wz = float(b)
+        except ValueError:
+            self._reply_parse_error(addr)
             return
+        if not (math.isfinite(vx) and math.isfinite(wz)):
+            self._reply_parse_error(addr)
+            return
+        vx = clamp(vx, -0.6, 0.6)
+        wz = clamp(wz, -2.0, 2.0)
+        self._publish_velocity(vx, wz)
+        self._reply(addr, f'ok: vel {vx:.3f} {wz:.3f}')
+
+    # drive forward/backward <meters> [speed <mps>]
+    def _do_drive(self, rest: str, addr):
+        m = _DRIVE_RE.match(rest)
+        if not m:
+            self._reply_parse_error(addr)
+            return
+        direction = m.group(1).lower()
+        meters = float(m.group(2))
+        speed = float(m.group(3)) if m.group(3) is not None else self.default_drive_speed
+        meters = abs(meters) if direction == 'forward' else -abs(meters)
+        speed = clamp(speed, 0.05, 0.5)
+        self._send_drive_distance(meters, speed, addr)
+
+    # rotate clockwise/counterclockwise <degrees> [speed <radps>]
+    def _do_rotate(self, rest: str, addr):
+        m = _ROTATE_RE.match(rest)
+        if not m:
+            self._reply_parse_error(addr)
+            return
+        sense = m.group(1).lower()
+        degrees = float(m.group(2))
+        rot_speed = float(m.group(3)) if m.group(3) is not None else self.default_rot_speed
+        radians = abs(degrees) * _DEG2RAD
+        if sense == 'clockwise':  # right-hand rule z-up: CW negative
+            radians = -radians
+        rot_speed = clamp(rot_speed, 0.1, 1.5)
+        self._send_rotate_angle(radians, rot_speed, addr)
+
+    # -------- Velocity publisher (bound to _publish_velocity in __init__) --------
+    def _publish_stamped(self, vx: float, wz: float):
+        msg = self._vel_msg
+        msg.header.stamp = self.get_clock().now().to_msg()
+        msg.twist.linear.x = vx
+        msg.twist.angular.z = wz
+        self.vel_pub.publish(msg)
 
-        # not matched
-        self._reply(addr, 'error: could not parse command\n' + COMMAND_HELP)
-
-    # -------- Velocity publisher --------
-    def _publish_velocity(self, vx: float, wz: float):
-        if self.use_twist_stamped:
-            msg = TwistStamped()
-            msg.header.stamp = self.get_clock().now().to_msg()
-            msg.twist.linear.x = vx
-            msg.twist.angular.z = wz
-        else:
-            msg = Twist()
-            msg.linear.x = vx
-            msg.angular.z = wz
+    def _publish_plain(self, vx: float, wz: float):
+        msg = self._vel_msg
+        msg.linear.x = vx
+        msg.angular.z = wz
         self.vel_pub.publish(msg)
 
     # -------- DriveDistance --------
     def _send_drive_distance(self, meters: float, speed: float, addr):
-        if not self.drive_client.wait_for_server(timeout_sec=0.5):
+        # non-blocking check: runs on the executor thread; _wait_for_action_servers watches readiness
+        if not self.drive_client.server_is_ready():
             self._reply(addr, f'error: {self.drive_action_name} server not ready')
             return
 
@@ -215,26 +304,12 @@ class TurtleBotEthernetBridge(Node):
         goal.distance = float(meters)
         goal.max_translation_speed = float(speed)
 
-        self.get_logger().info(f'DriveDistance: {meters:.3f} m @ {speed:.2f} m/s')
-        fut = self.drive_client.send_goal_async(goal)
-        fut.add_done_callback(partial(self._drive_goal_sent, addr=addr))
-
-    def _drive_goal_sent(self, future, addr):
-        goal_handle = future.result()
-        if not goal_handle or not goal_handle.accepted:
-            self._reply(addr, 'error: drive goal rejected')
-            return
-        self._reply(addr, 'ok: drive goal accepted')
-        result_future = goal_handle.get_result_async()
-        result_future.add_done_callback(partial(self._drive_result, addr=addr))
-
-    def _drive_result(self, future, addr):
-        _ = future.result().result
-        self._reply(addr, 'ok: drive done')
+        self._log.info(f'DriveDistance: {meters:.3f} m @ {speed:.2f} m/s')
+        self.executor.create_task(self._run_goal(self.drive_client, goal, 'drive', addr))
 
     # -------- RotateAngle --------
     def _send_rotate_angle(self, radians: float, rot_speed: float, addr):
-        if not self.rotate_client.wait_for_server(timeout_sec=0.5):
+        if not self.rotate_client.server_is_ready():
             self._reply(addr, f'error: {self.rotate_action_name} server not ready')
             return
 
@@ -242,22 +317,18 @@ class TurtleBotEthernetBridge(Node):
         goal.angle = float(radians)
         goal.max_rotation_speed = float(rot_speed)
 
-        self.get_logger().info(f'RotateAngle: {math.degrees(radians):.1f} deg @ {rot_speed:.2f} rad/s')
-        fut = self.rotate_client.send_goal_async(goal)
-        fut.add_done_callback(partial(self._rotate_goal_sent, addr=addr))
+        self._log.info(f'RotateAngle: {math.degrees(radians):.1f} deg @ {rot_speed:.2f} rad/s')
+        self.executor.create_task(self._run_goal(self.rotate_client, goal, 'rotate', addr))
 
-    def _rotate_goal_sent(self, future, addr):
-        goal_handle = future.result()
+    # -------- Goal lifecycle (coroutine run as an executor task) --------
+    async def _run_goal(self, client, goal, kind: str, addr):
+        goal_handle = await client.send_goal_async(goal)
         if not goal_handle or not goal_handle.accepted:
-            self._reply(addr, 'error: rotate goal rejected')
+            self._reply(addr, f'error: {kind} goal rejected')
             return
-        self._reply(addr, 'ok: rotate goal accepted')
-        result_future = goal_handle.get_result_async()
-        result_future.add_done_callback(partial(self._rotate_result, addr=addr))
-
-    def _rotate_result(self, future, addr):
-        _ = future.result().result
-        self._reply(addr, 'ok: rotate done')
+        self._reply(addr, f'ok: {kind} goal accepted')
+        await goal_handle.get_result_async()
+        self._reply(addr, f'ok: {kind} done')
 
     # -------- Reply to sender (optional ack over UDP) --------
     def _reply(self, addr, text: str):